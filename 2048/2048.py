@@ -30,6 +30,9 @@ class Game:
     self.scorefont = pygame.font.SysFont("arial", 30)
     self.tileMatrix = [[0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
     self.undoMat = []
+    self.cache = TranspositionCache() # expectimax values, shared by the searches of every move
+    self.move_time = 0.2 # seconds per AI move: the search deepens while this lasts
+    self.max_depth = 8 # deepest search of an AI move
   def loop(self, fromLoaded = False):
     auto = True # change to true to run AI
     if not fromLoaded:
@@ -39,8 +42,8 @@ class Game:
     while True:
       if auto:
         if self.checkIfCanGo():
-          ai = Gametree(copy.deepcopy(self.tileMatrix), 3) # grow tree of depth 3
-          direction = ai.compute_decision()
+          ai = Gametree(copy.deepcopy(self.tileMatrix), self.max_depth, self.cache) # iterative deepening expectimax
+          direction = ai.compute_decision(self.move_time)
           self.move(direction)
           auto = True
         else:
@@ -107,7 +110,7 @@ class Game:
       j = random.randint(0,self.board_size-1)
       if self.tileMatrix[i][j] == 0:
         break
-    self.tileMatrix[i][j] = 2
+    self.tileMatrix[i][j] = 4 if random.random() < 0.1 else 2 # as in the original game, and as the AI expects
   def moveTiles(self):
     tm = self.tileMatrix
     for i in range(0, self.board_size):
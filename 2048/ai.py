@@ -1,12 +1,15 @@
 from __future__ import print_function
 import copy, random
 import sys
-import numpy as np
+import time
+from packed import *
+from transposition import *
 
 MOVES = {0:'up', 1:'left', 2:'down', 3:'right'}
 MAX = 1
 CHANCE = 0
 ARR_SIZE = 16
+SPAWNS = ((1, 0.9), (2, 0.1)) # log2 of the tile placed after every move (2 or 4) and its probability
 
 class State:
   """game state information"""
@@ -31,82 +34,103 @@ class State:
     
     return max_tile # return highest tile value
 
+class SearchTimeout(Exception):
+  """Raised inside the search when the time budget of an iterative deepening search runs out"""
+
 class Gametree:
   """main class for the AI"""
-  def __init__(self, root, depth):
+  def __init__(self, root, depth, cache=None, min_probability=0.0001):
     self.rootState = State(root, MAX, 0, None, None) # root is max player with score of 0
-    self.depth = depth # store depth of minimax tree
-    self.dict = {0:[self.rootState], 1:[], 2:[], 3:[], 4:[], 5:[], 6:[]} # dictionary to store structure of tree
-
-  def grow_once(self, state):
-    """Grow the tree one level deeper"""
-
-    if (state.player == MAX):
-      for direction in MOVES: # expand all possibilities for node
-        if (state.pre_move == None): # if the state is a root
-          sim = Simulator(copy.deepcopy(state.tm), 0) # score entered into simulator is 0
-        else:
-          sim = Simulator(copy.deepcopy(state.tm), state.score) # if not root, score entered into simulator is state's score
-
-        if sim.checkIfCanGo(): # if not game over
-          sim.move(direction) # move simulator in specified direction
-
-          if sim.tileMatrix != state.tm: # if there was a state chagne
-            state.children.append(State(sim.tileMatrix, CHANCE, sim.total_points, state, direction)) # keep track of new State child
-
-    elif (state.player == CHANCE):      
-      # expand possibilities for node
-      for i in range(len(state.tm)):
-        for j in range(len(state.tm[i])):
-          if (state.tm[i][j] == 0): # if there is an empty spot in the matrix
-            sim = Simulator(copy.deepcopy(state.tm), state.score)
-            sim.tileMatrix[i][j] = 2 # simulate a 2 in that empty spot
-            
-            if sim.checkIfCanGo():
-              state.children.append(State(sim.tileMatrix, MAX, sim.total_points, state, None)) # keep track of new State child
-    
-  def grow(self, state):
-    """Grow the full tree from root"""
-
-    depthTemp = 0
-    while (depthTemp <= self.depth): 
-      for child in self.dict[depthTemp]: # for every node in specified depth
-        self.grow_once(child) # grow that node once (one level)
-        self.dict[depthTemp + 1].extend(child.children) # add the children of that node to next depth (stored in dictionary)
-      depthTemp+=1
-
-  def minimax(self, state):
-    """Compute minimax values on the three"""
-    if not state.children:
-      return (state.score + state.highest_tile()) + (ARR_SIZE - np.count_nonzero(state.tm)) # weighted score of terminal node is score of state + state's highest tile + num of zeroes in the matrix
-    elif state.player == MAX:
-      value = -sys.maxsize
-      for child in state.children:
-        value = max(value, self.minimax(child)) # store maximum minimax value for any node
-      return value
-    elif state.player == CHANCE:
+    self.depth = depth # number of moves and spawns searched below the root's children
+    self.cache = cache # TranspositionCache of values by board, kept by the caller to reuse it on the next move
+    self.min_probability = min_probability # spawns less likely than this from the root are evaluated, not searched
+    self.deadline = None # time.time() at which an iterative deepening search gives up its current depth
+    self.pruned = 0 # spawns evaluated instead of searched so far; a subtree where this grew is not cached
+
+  def evaluate(self, board):
+    """Weighted score of a leaf, besides the score: state's highest tile + num of zeroes in the matrix"""
+    return highest_tile(board) + len(empty_cells(board))
+
+  def expectimax(self, board, player, level, probability=1.0):
+    """Expectimax value of the packed board at level, searched depth first so only the current path is in memory
+
+    The score won before reaching the board is left out; the value counts the points of the moves below it
+    and the leaf evaluation, so it only depends on the board and the depth left.
+    probability is the chance of reaching the board from the root, for pruning unlikely spawns.
+    Values of pruned subtrees depend on that path probability, so only unpruned ones are cached.
+    """
+    if level > self.depth: # leaves of the search
+      return self.evaluate(board)
+    if self.deadline != None and time.time() > self.deadline:
+      raise SearchTimeout()
+
+    depthLeft = self.depth - level + 1
+    key = board * 2 + player
+    if self.cache != None:
+      value = self.cache.get(key, depthLeft)
+      if value != None:
+        return value
+    pruned = self.pruned
+
+    if player == MAX:
+      value = None
+      for direction in MOVES: # every move that changes the board
+        child, points = move_board(board, direction)
+        if child != board:
+          childValue = points + self.expectimax(child, CHANCE, level + 1, probability)
+          if value == None or childValue > value:
+            value = childValue
+      if value == None: # game over
+        value = self.evaluate(board)
+    else:
+      cells = empty_cells(board)
       value = 0
-      for child in state.children:
-        value = value + self.minimax(child)*(1/len(state.children)) # calculate minimax value for chance node
-      return value
+      for cell in cells: # simulate a 2 or a 4 in every empty spot, weighted by how likely it is
+        for tile, chance in SPAWNS:
+          child = board | (tile << (4 * cell))
+          weight = chance / len(cells)
+          if probability * weight < self.min_probability:
+            value += weight * self.evaluate(child) # too unlikely to be worth searching
+            self.pruned += 1
+          else:
+            value += weight * self.expectimax(child, MAX, level + 1, probability * weight)
+      if not cells:
+        value = self.evaluate(board)
+
+    if self.cache != None and self.pruned == pruned:
+      self.cache.put(key, value, depthLeft)
+    return value
+
+  def compute_decision(self, time_limit=None):
+    """Derive a decision
+
+    With time_limit (seconds), search depth 1, 2, ... up to self.depth while time is left
+    and keep the move of the deepest search that completed.
+    """
+    if time_limit == None:
+      decision, tempMax = self.search_root()
     else:
-      print("Error!")
-
-  def compute_decision(self):
-    """Derive a decision"""
-    self.grow(self.rootState) # grow tree from root
-
-    tempMax = 0
+      maxDepth = self.depth
+      start = time.time()
+      self.depth = 1
+      decision, tempMax = self.search_root() # depth 1 always completes, so there is a move
+      completed = 1
+      while completed < maxDepth:
+        elapsed = time.time() - start
+        if elapsed * 2 > time_limit: # the next depth takes longer than all shallower ones did
+          break
+        self.depth = completed + 1
+        self.deadline = start + time_limit
+        try:
+          decision, tempMax = self.search_root()
+        except SearchTimeout:
+          break
+        finally:
+          self.deadline = None
+        completed += 1
+      self.depth = completed
+      print("Search depth: ", completed)
 
-    for child in self.dict[1]: # look at max nodes at depth 1 in tree
-      child.minimaxScore = self.minimax(child) # find minimax value for each max node
-      
-      # find node with maximum minimax value
-      if child.minimaxScore > tempMax:
-        tempMax = child.minimaxScore
-        tempState = child
-
-    decision = tempState.movement # decision to make is the decision encoded in max node state with highest minimax value
     print(MOVES[decision])
 
     #Should also print the minimax value at the root
@@ -114,77 +138,48 @@ class Gametree:
 
     return decision
 
+  def search_root(self):
+    """Best move at the root and its expectimax value, searched self.depth deep"""
+    board = pack(self.rootState.tm)
+
+    tempMax = 0
+    decision = None
+
+    for direction in MOVES: # look at the move of each child of the root
+      child, points = move_board(board, direction)
+      if child == board:
+        continue
+      value = points + self.expectimax(child, CHANCE, 1)
+
+      # find move with maximum expectimax value
+      if value > tempMax or decision == None:
+        tempMax = value
+        decision = direction
+
+    return decision, tempMax
+
 class Simulator:
   """Simulation of the game"""
-  #Hint: You basically need to copy all the code from the game engine itself.
-  #Hint: The GUI code from the game engine should be removed. 
-  #Hint: Be very careful not to mess with the real game states. 
+  # The board is packed into one int (see packed.py), so a move is a few table lookups
+  # and the real game's matrix is never touched
   def __init__(self, matrix, score):
-    self.tileMatrix = matrix
+    self.board = pack(matrix)
     self.total_points = score
     self.board_size = 4
 
+  @property
+  def tileMatrix(self):
+    return unpack(self.board)
+
   def move(self, direction):
-    for i in range(0, direction):
-      self.rotateMatrixClockwise()
-    if self.canMove():
-      self.moveTiles()
-      self.mergeTiles()
-    for j in range(0, (4 - direction) % 4):
-      self.rotateMatrixClockwise()
-  def moveTiles(self):
-    tm = self.tileMatrix
-    for i in range(0, self.board_size):
-      for j in range(0, self.board_size - 1):
-        while tm[i][j] == 0 and sum(tm[i][j:]) > 0:
-          for k in range(j, self.board_size - 1):
-            tm[i][k] = tm[i][k + 1]
-          tm[i][self.board_size - 1] = 0
-  def mergeTiles(self):
-    tm = self.tileMatrix
-    for i in range(0, self.board_size):
-      for k in range(0, self.board_size - 1):
-        if tm[i][k] == tm[i][k + 1] and tm[i][k] != 0:
-          tm[i][k] = tm[i][k] * 2
-          tm[i][k + 1] = 0
-          self.total_points += tm[i][k]
-          self.moveTiles()
+    self.board, points = move_board(self.board, direction)
+    self.total_points += points
   def checkIfCanGo(self):
-    tm = self.tileMatrix
-    for i in range(0, self.board_size ** 2):
-      if tm[int(i / self.board_size)][i % self.board_size] == 0:
-        return True
-    for i in range(0, self.board_size):
-      for j in range(0, self.board_size - 1):
-        if tm[i][j] == tm[i][j + 1]:
-          return True
-        elif tm[j][i] == tm[j + 1][i]:
-          return True
-    return False
-  def canMove(self):
-    tm = self.tileMatrix
-    for i in range(0, self.board_size):
-      for j in range(1, self.board_size):
-        if tm[i][j-1] == 0 and tm[i][j] > 0:
-          return True
-        elif (tm[i][j-1] == tm[i][j]) and tm[i][j-1] != 0:
-          return True
-    return False
-  def rotateMatrixClockwise(self):	
-    tm = self.tileMatrix
-    for i in range(0, int(self.board_size/2)):
-      for k in range(i, self.board_size- i - 1):
-        temp1 = tm[i][k]
-        temp2 = tm[self.board_size - 1 - k][i]
-        temp3 = tm[self.board_size - 1 - i][self.board_size - 1 - k]
-        temp4 = tm[k][self.board_size - 1 - i]
-        tm[self.board_size - 1 - k][i] = temp1
-        tm[self.board_size - 1 - i][self.board_size - 1 - k] = temp2
-        tm[k][self.board_size - 1 - i] = temp3
-        tm[i][k] = temp4
+    return can_move(self.board)
   def convertToLinearMatrix(self):
     m = []
+    tm = self.tileMatrix
     for i in range(0, self.board_size ** 2):
-      m.append(self.tileMatrix[int(i / self.board_size)][i % self.board_size])
+      m.append(tm[int(i / self.board_size)][i % self.board_size])
     m.append(self.total_points)
     return m
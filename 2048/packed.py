@@ -0,0 +1,119 @@
+# 4x4 board packed into one 64-bit int: 4 bits per cell holding log2 of the tile (0 for empty),
+# cell (i, j) in bits 4 * (4 * i + j), so row i of the matrix is the 16 bits at 16 * i
+
+ROW_MASK = 0xFFFF
+_tables = {} # row move tables, built once
+
+class RowTables:
+  """Result and points of sliding every possible 16-bit row towards nibble 0 (left) and towards nibble 3 (right)"""
+  def __init__(self):
+    self.left = [0] * 65536
+    self.right = [0] * 65536
+    self.left_points = [0] * 65536
+    self.right_points = [0] * 65536
+
+    for row in range(65536):
+      tiles = [(row >> (4 * k)) & 0xF for k in range(4)]
+      merged, points = slide(tiles)
+      result = 0
+      for k in range(4):
+        result |= merged[k] << (4 * k)
+      self.left[row] = result
+      self.left_points[row] = points
+
+      # the right move is the left move of the reversed row, reversed back
+      reverse = reverse_row(row)
+      self.right[reverse] = reverse_row(result)
+      self.right_points[reverse] = points
+
+def slide(tiles):
+  # slide log2 tiles towards index 0, merging equal pairs once as the game does; returns the tiles and points won
+  values = [t for t in tiles if t]
+  merged = []
+  points = 0
+  k = 0
+  while k < len(values):
+    if k + 1 < len(values) and values[k] == values[k + 1]:
+      tile = min(values[k] + 1, 15) # a nibble holds tiles up to 32768
+      merged.append(tile)
+      points += 1 << tile
+      k += 2
+    else:
+      merged.append(values[k])
+      k += 1
+  return merged + [0] * (len(tiles) - len(merged)), points
+
+def reverse_row(row):
+  return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12)
+
+def get_tables():
+  if 'rows' not in _tables:
+    _tables['rows'] = RowTables()
+  return _tables['rows']
+
+def pack(matrix):
+  board = 0
+  for i in range(4):
+    for j in range(4):
+      if matrix[i][j]:
+        board |= (matrix[i][j].bit_length() - 1) << (4 * (4 * i + j))
+  return board
+
+def unpack(board):
+  matrix = []
+  for i in range(4):
+    row = []
+    for j in range(4):
+      tile = (board >> (4 * (4 * i + j))) & 0xF
+      row.append(1 << tile if tile else 0)
+    matrix.append(row)
+  return matrix
+
+def transpose(board):
+  # swap cell (i, j) with (j, i): first within each 2x2 block, then the off-diagonal blocks
+  a1 = board & 0xF0F00F0FF0F00F0F
+  a2 = board & 0x0000F0F00000F0F0
+  a3 = board & 0x0F0F00000F0F0000
+  a = a1 | (a2 << 12) | (a3 >> 12)
+  b1 = a & 0xFF00FF0000FF00FF
+  b2 = a & 0x00FF00FF00000000
+  b3 = a & 0x00000000FF00FF00
+  return b1 | (b2 >> 24) | (b3 << 24)
+
+def move_rows(board, table, points_table):
+  result = 0
+  points = 0
+  for shift in (0, 16, 32, 48):
+    row = (board >> shift) & ROW_MASK
+    result |= table[row] << shift
+    points += points_table[row]
+  return result, points
+
+# board and points after moving in direction, with directions numbered as in ai.MOVES
+# 0 slides rows towards column 0, 1 columns towards row 0, 2 rows towards column 3 and 3 columns towards row 3
+def move_board(board, direction):
+  tables = get_tables()
+  if direction == 0:
+    return move_rows(board, tables.left, tables.left_points)
+  if direction == 2:
+    return move_rows(board, tables.right, tables.right_points)
+  if direction == 1:
+    result, points = move_rows(transpose(board), tables.left, tables.left_points)
+  else:
+    result, points = move_rows(transpose(board), tables.right, tables.right_points)
+  return transpose(result), points
+
+def empty_cells(board):
+  # indices of the empty cells, as nibble positions 4 * i + j
+  return [k for k in range(16) if not (board >> (4 * k)) & 0xF]
+
+def highest_tile(board):
+  highest = 0
+  while board:
+    highest = max(highest, board & 0xF)
+    board >>= 4
+  return 1 << highest if highest else 0
+
+def can_move(board):
+  # True if some move changes the board
+  return any(move_board(board, direction)[0] != board for direction in range(4))
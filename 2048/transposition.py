@@ -0,0 +1,30 @@
+from collections import OrderedDict
+
+class TranspositionCache:
+  """Bounded map from packed board and player to (value, searched depth), evicting the least recently used entry"""
+  # Values leave out the score already won, so entries stay valid from one move of the game to the next
+  def __init__(self, capacity=100000):
+    self.capacity = capacity
+    self.entries = OrderedDict()
+    self.hits = 0
+
+  def __len__(self):
+    return len(self.entries)
+
+  # value of key searched at least depth deep, or None
+  def get(self, key, depth):
+    entry = self.entries.get(key)
+    if entry == None or entry[1] < depth:
+      return None
+    self.entries.move_to_end(key)
+    self.hits += 1
+    return entry[0]
+
+  def put(self, key, value, depth):
+    self.entries[key] = (value, depth)
+    self.entries.move_to_end(key)
+    if len(self.entries) > self.capacity:
+      self.entries.popitem(last=False)
+
+  def clear(self):
+    self.entries.clear()
@@ -0,0 +1,153 @@
+from __future__ import print_function
+from concurrent.futures import ProcessPoolExecutor
+from math import sqrt
+import argparse
+import random
+import time
+from bitboard import *
+from mcts import *
+from randplay import *
+
+# an agent is a dict: {'type': 'mcts' or 'random'}, plus MCTS keyword arguments
+# and the make_move budget keys 'time_limit' and 'max_nodes' for MCTS agents
+MOVE_BUDGET = ('time_limit', 'max_nodes')
+
+def parse_agent(text):
+    # "mcts:iterations=400,rollout_policy=pattern" -> {'type': 'mcts', 'iterations': 400, 'rollout_policy': 'pattern'}
+    name, _, options = text.partition(':')
+    agent = {'type': name}
+    for option in filter(None, options.split(',')):
+        key, value = option.split('=')
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                pass
+        agent[key] = value
+    return agent
+
+class Player:
+    """One agent taking part in a single headless game"""
+    def __init__(self, agent, grid, piece, config=DEFAULT_CONFIG):
+        self.agent = agent
+        self.piece = piece
+        self.search = None
+        if agent['type'] == 'mcts':
+            options = dict((key, value) for key, value in agent.items() if key != 'type' and key not in MOVE_BUDGET)
+            self.search = MCTS(grid, piece, config=config, **options)
+        else:
+            self.random = Randplay(grid, piece, config)
+
+    # called with every piece placed on the grid, by either player
+    def update(self, r, c, piece):
+        if self.search == None:
+            self.random.update(r, c, piece)
+
+    # returns the move and the number of search iterations it took
+    def make_move(self, grid):
+        if self.search == None:
+            return self.random.make_move(), 0
+        self.search.set_position(grid, self.piece) # reuse the tree from this player's previous move
+        move = self.search.make_move(time_limit=self.agent.get('time_limit'), max_nodes=self.agent.get('max_nodes'))
+        return move, self.search.iteration_count
+
+# play one game with agent 0 as black when first is 0; returns the winning agent (None for a draw) and per-move stats
+def play_game(agents, first, seed, config=DEFAULT_CONFIG):
+    random.seed(seed)
+    grid = config.empty_grid()
+    board = Bitboard(config)
+    order = (first, 1 - first) # agent index playing black, then white
+    players = (Player(agents[order[0]], grid, 'b', config), Player(agents[order[1]], grid, 'w', config))
+    moves = [] # (agent index, seconds, iterations)
+
+    for ply in range(config.grid_count * config.grid_count):
+        turn = ply % 2
+        start = time.time()
+        (r, c), iterations = players[turn].make_move(grid)
+        moves.append((order[turn], time.time() - start, iterations))
+
+        grid[r][c] = players[turn].piece
+        for player in players:
+            player.update(r, c, players[turn].piece)
+        if board.do_move(r, c, players[turn].piece):
+            return order[turn], moves
+    return None, moves
+
+def play_games(args):
+    agents, games, config = args
+    return [play_game(agents, first, seed, config) for first, seed in games]
+
+def wilson_interval(wins, games, z=1.96):
+    # 95% confidence interval of a win rate
+    if games == 0:
+        return (0.0, 1.0)
+    p = wins / float(games)
+    center = (p + z * z / (2 * games)) / (1 + z * z / games)
+    spread = z * sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / (1 + z * z / games)
+    return (max(0.0, center - spread), min(1.0, center + spread))
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+# play games between two agents, alternating colors, across worker processes; returns the report as a dict
+def run_arena(agents, games, workers=1, seed=0, chunk=10, config=DEFAULT_CONFIG):
+    rng = random.Random(seed)
+    schedule = [(i % 2, rng.getrandbits(32)) for i in range(games)]
+    chunks = [(agents, schedule[i:i + chunk], config) for i in range(0, games, chunk)]
+
+    start = time.time()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [result for part in pool.map(play_games, chunks) for result in part]
+    else:
+        results = [result for part in map(play_games, chunks) for result in part]
+    elapsed = time.time() - start
+
+    report = {'games': games, 'draws': 0, 'seconds': elapsed, 'agents': []}
+    for index in range(2):
+        report['agents'].append({'agent': agents[index], 'wins': 0, 'moves': 0, 'seconds': 0.0, 'iterations': 0, 'latencies': []})
+    for winner, moves in results:
+        if winner == None:
+            report['draws'] += 1
+        else:
+            report['agents'][winner]['wins'] += 1
+        for index, seconds, iterations in moves:
+            stats = report['agents'][index]
+            stats['moves'] += 1
+            stats['seconds'] += seconds
+            stats['iterations'] += iterations
+            stats['latencies'].append(seconds)
+
+    for stats in report['agents']:
+        stats['win_rate'] = stats['wins'] / float(games) if games else 0.0
+        stats['win_interval'] = wilson_interval(stats['wins'], games)
+        stats['moves_per_sec'] = stats['moves'] / stats['seconds'] if stats['seconds'] else 0.0
+        stats['iterations_per_sec'] = stats['iterations'] / stats['seconds'] if stats['seconds'] else 0.0
+        latencies = stats.pop('latencies')
+        stats['latency'] = dict((name, percentile(latencies, fraction)) for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)))
+    return report
+
+def print_report(report):
+    print("Games:", report['games'], "Draws:", report['draws'], "Time: %.1fs" % report['seconds'])
+    for stats in report['agents']:
+        low, high = stats['win_interval']
+        print(stats['agent'])
+        print("  win rate %.3f (95%% CI %.3f-%.3f), %d wins" % (stats['win_rate'], low, high, stats['wins']))
+        print("  %.1f moves/s, %.0f iterations/s" % (stats['moves_per_sec'], stats['iterations_per_sec']))
+        print("  move latency p50 %.4fs p90 %.4fs p99 %.4fs" % (stats['latency']['p50'], stats['latency']['p90'], stats['latency']['p99']))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play connect-five agents against each other without the pygame board.")
+    parser.add_argument('--a', default='mcts', help="first agent, e.g. mcts:iterations=400,rollout_policy=pattern")
+    parser.add_argument('--b', default='random', help="second agent, e.g. random")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    config = config_from_args(args)
+    print_report(run_arena([parse_agent(args.a), parse_agent(args.b)], args.games, args.workers, args.seed, config=config))
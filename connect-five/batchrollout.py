@@ -0,0 +1,91 @@
+import random
+import numpy as np
+from winlines import *
+from config import *
+
+class BatchRollout:
+    """Plays many random rollouts from one position at once on an (N, grid_count, grid_count) array"""
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.grid_count = grid_count = config.grid_count
+        self.exact = config.exact
+        self.rng = np.random.default_rng(random.getrandbits(32)) # seeded from random so that seeding random is enough
+        self.moves = 0 # moves played by all rollouts of the last run
+
+        # lines through each cell, padded with a dummy line so every cell has the same number of entries
+        lines = get_win_lines(grid_count, config.length)
+        self.length = lines.length
+        self.dummy = len(lines.masks)
+        # lines just before and after each line, for the exact rule; the dummy line stands in for missing ones
+        self.neighbours = np.array(lines.neighbours + [(-1, -1)], np.int32).reshape(-1, 2)
+        self.neighbours[self.neighbours < 0] = self.dummy
+        width = max(len(cell) for cell in lines.cell_lines)
+        self.cell_lines = np.full((grid_count * grid_count, width), self.dummy, np.int32)
+        for idx, cell in enumerate(lines.cell_lines):
+            self.cell_lines[idx, :len(cell)] = cell
+
+        # line counts of a position, from the bitboard masks of the lines
+        self.line_cells = np.zeros((len(lines.masks), grid_count * grid_count), np.int8)
+        for line, cell in enumerate(lines.masks):
+            self.line_cells[line] = self.to_cells(cell)
+
+    def to_cells(self, bits):
+        # bitboard -> flat 0/1 array with one entry per cell
+        size = self.grid_count * self.grid_count
+        return np.unpackbits(np.frombuffer(bits.to_bytes((size + 7) // 8, 'little'), np.uint8), bitorder='little')[:size]
+
+    # play count random rollouts from the board, with player to move, the same way as MCTS.default_policy
+    # returns the winner code of every rollout: 1 black, 2 white, 3 draw
+    def run(self, board, player, count):
+        n = self.grid_count
+        rows = np.arange(count)
+        cells = np.zeros((count, n * n), np.int8) # 0 empty, 1 black, 2 white
+        counts = np.zeros((count, 3, self.dummy + 1), np.int8) # pieces of each player on each line
+        for code, piece in ((1, 'b'), (2, 'w')):
+            stones = self.to_cells(board.pieces[piece])
+            cells[:, stones == 1] = code
+            counts[:, code, :self.dummy] = self.line_cells @ stones
+        counts[:, :, self.dummy] = 0
+
+        winners = np.zeros(count, np.int8)
+        active = np.ones(count, bool)
+        mover = 1 if player == 'b' else 2
+        self.moves = 0
+        while active.any():
+            live = rows[active]
+            grid = cells[live].reshape(-1, n, n)
+
+            # empty cells directly above, below, left or right of one of the mover's stones
+            own = grid == mover
+            adj = np.zeros_like(own)
+            adj[:, 1:, :] |= own[:, :-1, :]
+            adj[:, :-1, :] |= own[:, 1:, :]
+            adj[:, :, 1:] |= own[:, :, :-1]
+            adj[:, :, :-1] |= own[:, :, 1:]
+            adj &= grid == 0
+            adj = adj.reshape(len(live), -1)
+
+            # In the unlikely event that no one wins before board is filled
+            stuck = ~adj.any(axis=1)
+            winners[live[stuck]] = 3
+            active[live[stuck]] = False
+            live = live[~stuck]
+            adj = adj[~stuck]
+
+            # uniform pick among the candidates: the candidate with the largest random key
+            move = np.argmax(self.rng.random(adj.shape) * adj, axis=1)
+            self.moves += len(live)
+            cells[live, move] = mover
+            lines = self.cell_lines[move]
+            counts[live[:, None], mover, lines] += 1
+            counts[:, :, self.dummy] = 0
+
+            full = counts[live[:, None], mover, lines] >= self.length
+            if self.exact: # a full line next to another full line is an overline
+                for side in range(2):
+                    full &= counts[live[:, None], mover, self.neighbours[lines, side]] < self.length
+            won = full.any(axis=1)
+            winners[live[won]] = mover
+            active[live[won]] = False
+
+            mover = 3 - mover
+        return winners
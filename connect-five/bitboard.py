@@ -0,0 +1,129 @@
+from winlines import *
+from moveset import *
+from zobrist import *
+from config import *
+
+class Bitboard:
+    """Connect-five board stored as one integer bitboard per player"""
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.config = config
+        self.grid_count = grid_count = config.grid_count
+        self.pieces = {'b': 0, 'w': 0} # bit (r * grid_count + c) is set where the player has a stone
+        self.history = [] # stack of (player, r, c) moves that can be undone
+        self.lines = WinTracker(grid_count, config.length, config.exact) # per-line piece counts for win detection
+        self.frontier = {'b': MoveSet(), 'w': MoveSet()} # empty cells next to each player's stones
+        self.zobrist = get_zobrist(grid_count)
+        self.hash = 0 # Zobrist hash of the stones on the board, updated with every move
+        self.symmetric_hash = 0 # hashes of the board under the 8 symmetries, packed as in Zobrist.symmetric
+
+        # masks used to shift stones one column without wrapping onto the next row
+        row = (1 << grid_count) - 1
+        self.full_mask = 0
+        self.not_left_col = 0
+        self.not_right_col = 0
+        for r in range(grid_count):
+            self.full_mask |= row << (r * grid_count)
+            self.not_left_col |= (row ^ 1) << (r * grid_count)
+            self.not_right_col |= (row >> 1) << (r * grid_count)
+
+        # cells directly above, below, left and right of each cell, as a list and as a bitboard mask
+        self.adjacent = []
+        self.adjacent_mask = []
+        for r in range(grid_count):
+            for c in range(grid_count):
+                cells = [(r + dr, c + dc) for dr, dc in ((0, -1), (0, 1), (1, 0), (-1, 0))
+                         if 0 <= r + dr < grid_count and 0 <= c + dc < grid_count]
+                mask = 0
+                for nr, nc in cells:
+                    mask |= 1 << (nr * grid_count + nc)
+                self.adjacent.append(cells)
+                self.adjacent_mask.append(mask)
+
+    @classmethod
+    def from_grid(cls, grid, config=None):
+        board = cls(config if config != None else GameConfig(len(grid)))
+        for r in range(len(grid)):
+            for c in range(len(grid)):
+                if grid[r][c] != '.':
+                    board.do_move(r, c, grid[r][c])
+        board.history = [] # the starting position cannot be undone
+        return board
+
+    def occupied(self):
+        return self.pieces['b'] | self.pieces['w']
+
+    def get(self, r, c):
+        bit = 1 << (r * self.grid_count + c)
+        if self.pieces['b'] & bit:
+            return 'b'
+        if self.pieces['w'] & bit:
+            return 'w'
+        return '.'
+
+    # place a stone and return True if it completes a line
+    def do_move(self, r, c, player):
+        self.pieces[player] |= 1 << (r * self.grid_count + c)
+        self.history.append((player, r, c))
+        self.hash ^= self.zobrist.keys[player][r * self.grid_count + c]
+        self.symmetric_hash ^= self.zobrist.symmetric[player][r * self.grid_count + c]
+
+        self.frontier['b'].discard((r, c))
+        self.frontier['w'].discard((r, c))
+        occupied = self.occupied()
+        for nr, nc in self.adjacent[r * self.grid_count + c]:
+            if not occupied >> (nr * self.grid_count + nc) & 1:
+                self.frontier[player].add((nr, nc))
+
+        return self.lines.place(r, c, player)
+
+    def undo_move(self):
+        player, r, c = self.history.pop()
+        self.pieces[player] &= ~(1 << (r * self.grid_count + c))
+        self.lines.remove(r, c, player)
+        self.hash ^= self.zobrist.keys[player][r * self.grid_count + c]
+        self.symmetric_hash ^= self.zobrist.symmetric[player][r * self.grid_count + c]
+
+        # neighbours stay in the frontier only if another of player's stones touches them
+        for nr, nc in self.adjacent[r * self.grid_count + c]:
+            if (nr, nc) in self.frontier[player] and \
+                    not self.adjacent_mask[nr * self.grid_count + nc] & self.pieces[player]:
+                self.frontier[player].discard((nr, nc))
+        # the freed cell rejoins the frontier of whoever has a stone next to it
+        for p in ('b', 'w'):
+            if self.adjacent_mask[r * self.grid_count + c] & self.pieces[p]:
+                self.frontier[p].add((r, c))
+        return (r, c)
+
+    # smallest hash of the position over the 8 board symmetries, and the symmetry that gives it
+    # positions that are rotations or reflections of each other have the same canonical hash
+    def canonical(self):
+        best = (self.hash, 0)
+        for s in range(1, 8):
+            key = (self.symmetric_hash >> (64 * s)) & 0xFFFFFFFFFFFFFFFF
+            if key < best[0]:
+                best = (key, s)
+        return best
+
+    def undo_to(self, ply):
+        # take back moves until only the first `ply` moves of the history remain
+        while len(self.history) > ply:
+            self.undo_move()
+
+    # empty cells within radius rows and columns of any stone
+    def region(self, radius):
+        occupied = self.occupied()
+        near = occupied
+        for i in range(radius):
+            near |= ((near << 1) & self.not_left_col) | ((near >> 1) & self.not_right_col)
+        for i in range(radius):
+            near |= (near << self.grid_count) | (near >> self.grid_count)
+        return near & self.full_mask & ~occupied
+
+    def cells(self, bits):
+        # (r, c) coordinates of every set bit, lowest index first
+        moves = []
+        while bits:
+            low = bits & -bits
+            moves.append(divmod(low.bit_length() - 1, self.grid_count))
+            bits ^= low
+        return moves
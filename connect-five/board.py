@@ -2,19 +2,30 @@ from __future__ import print_function
 import pygame
 from randplay import *
 from mcts import *
+from winlines import *
+from config import *
 
 class Board:
-    def __init__(self):
+    def __init__(self, config=DEFAULT_CONFIG):
         self.grid_size = 26
         self.start_x, self.start_y = 30, 50
         self.edge_size = self.grid_size / 2
-        self.grid_count = 19
+        self.config = config # board size and winning rule, shared with the players
+        self.grid_count = config.grid_count
         self.piece = 'b'
         self.winner = None
         self.game_over = False
+        self.move_time = None # seconds per MCTS move in autoplay, None for a fixed iteration count
+        self.player1 = None # MCTS player of autoplay, kept between moves to reuse its search tree
         self.grid = []
         for i in range(self.grid_count):
             self.grid.append(list("." * self.grid_count))
+        self.lines = WinTracker(self.grid_count, config.length, config.exact) # per-line piece counts for win detection
+        self.random_player = Randplay(self.grid, self.piece, config) # random player, told about every piece placed
+    # window size that fits the board
+    def window_size(self):
+        board = (self.grid_count - 1) * self.grid_size
+        return (self.start_x * 2 + board + 2, self.start_y + self.start_x + board + 2)
     def handle_key_event(self, e):
         origin_x = self.start_x - self.edge_size
         origin_y = self.start_y - self.edge_size
@@ -31,6 +42,8 @@ class Board:
     def set_piece(self, r, c):
         if self.grid[r][c] == '.':
             self.grid[r][c] = self.piece
+            self.lines.place(r, c, self.piece)
+            self.random_player.update(r, c, self.piece)
             if self.piece == 'b':
                 self.piece = 'w'
             else:
@@ -41,15 +54,17 @@ class Board:
     #Two automatic players against each other
     def autoplay(self):
         if not self.game_over:
-            player1 = MCTS(self.grid, self.piece) # first player uses MCTS AI
-            r,c = player1.make_move()
-            print("Auto", self.piece, "move: (", r, ",", c, ")")
+            if self.player1 == None:
+                self.player1 = MCTS(self.grid, self.piece, config=self.config) # first player uses MCTS AI
+            else:
+                self.player1.set_position(self.grid, self.piece) # re-root onto the moves played since its last search
+            r,c = self.player1.make_move(time_limit=self.move_time)
+            print("Auto", self.piece, "move: (", r, ",", c, ")", self.player1.iteration_count, "iterations")
             self.set_piece(r, c)
             self.check_win(r, c)
 
         if not self.game_over:
-            player2 = Randplay(self.grid, self.piece) # second player is random
-            r,c = player2.make_move()
+            r,c = self.random_player.make_move() # second player is random
             print("Auto", self.piece, "move: (", r, ",", c, ")")
             self.set_piece(r, c)
             self.check_win(r, c)
@@ -58,44 +73,21 @@ class Board:
     def semi_autoplay(self):
         if not self.game_over:
             #Optional: Change this to MCTS AI and see whether you can win
-            player1 = Randplay(self.grid, self.piece)
-            r,c = player1.make_move()
+            r,c = self.random_player.make_move()
             print("Semi-Auto", self.piece, "move: (", r, ",", c, ")")
             self.set_piece(r, c)
             self.check_win(r, c)   
     def check_win(self, r, c):
-        n_count = self.get_continuous_count(r, c, -1, 0)
-        s_count = self.get_continuous_count(r, c, 1, 0)
-        e_count = self.get_continuous_count(r, c, 0, 1)
-        w_count = self.get_continuous_count(r, c, 0, -1)
-        se_count = self.get_continuous_count(r, c, 1, 1)
-        nw_count = self.get_continuous_count(r, c, -1, -1)
-        ne_count = self.get_continuous_count(r, c, -1, 1)
-        sw_count = self.get_continuous_count(r, c, 1, -1)
-        if (n_count + s_count + 1 >= 5) or (e_count + w_count + 1 >= 5) or \
-                (se_count + nw_count + 1 >= 5) or (ne_count + sw_count + 1 >= 5):
+        if self.lines.check_win(r, c, self.grid[r][c]):
             self.winner = self.grid[r][c]
             self.game_over = True
-    def get_continuous_count(self, r, c, dr, dc):
-        piece = self.grid[r][c]
-        result = 0
-        i = 1
-        while True:
-            new_r = r + dr * i
-            new_c = c + dc * i
-            if 0 <= new_r < self.grid_count and 0 <= new_c < self.grid_count:
-                if self.grid[new_r][new_c] == piece:
-                    result += 1
-                else:
-                    break
-            else:
-                break
-            i += 1
-        return result
     def restart(self):
         for r in range(self.grid_count):
             for c in range(self.grid_count):
                 self.grid[r][c] = '.'
+        self.lines = WinTracker(self.grid_count, self.config.length, self.config.exact)
+        self.random_player = Randplay(self.grid, 'b', self.config)
+        self.player1 = None
         self.piece = 'b'
         self.winner = None
         self.game_over = False
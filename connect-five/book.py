@@ -0,0 +1,61 @@
+import random
+import numpy as np
+from symmetry import *
+
+# one book entry: position key (see book_key), best move as a cell index on the canonical board, and the visits behind it
+BOOK_DTYPE = np.dtype([('key', '<u8'), ('move', '<i4'), ('visits', '<u4')])
+
+_books = {} # opened books, keyed by path
+_rule_keys = {} # random 64-bit key of every winning rule, keyed by (length, exact)
+
+class OpeningBook:
+    """Best moves of early positions, in a sorted array file that is memory-mapped rather than read"""
+    def __init__(self, path):
+        self.entries = np.load(path, mmap_mode='r')
+
+    def __len__(self):
+        return len(self.entries)
+
+    # move for the position on the board, or None if it is not in the book
+    def lookup(self, board):
+        key, s = book_key(board)
+        keys = self.entries['key']
+        i = int(np.searchsorted(keys, key))
+        if i == len(keys) or keys[i] != key:
+            return None
+        cell = get_symmetries(board.grid_count)[s].index(int(self.entries['move'][i])) # back from the canonical board
+        r, c = divmod(cell, board.grid_count)
+        if board.get(r, c) != '.': # hash collision
+            return None
+        return (r, c)
+
+# canonical hash of the position mixed with a key of the winning rule, and the symmetry that gives it
+# the Zobrist keys depend on the board size only, so this keeps a book built for other rules from matching
+def book_key(board):
+    key, s = board.canonical()
+    rule = (board.config.length, board.config.exact)
+    if rule not in _rule_keys:
+        _rule_keys[rule] = random.Random('%d %d' % rule).getrandbits(64) # fixed seed, as for the Zobrist keys
+    return key ^ _rule_keys[rule], s
+
+# entry for playing (r, c) on the board, to be written with save_book
+def book_entry(board, r, c, visits):
+    key, s = book_key(board)
+    return key, get_symmetries(board.grid_count)[s][r * board.grid_count + c], visits
+
+def save_book(path, entries):
+    # entries: iterable of (key, move, visits); the one with the most visits is kept for every key
+    best = {}
+    for key, move, visits in entries:
+        if key not in best or visits > best[key][1]:
+            best[key] = (move, visits)
+    table = np.zeros(len(best), BOOK_DTYPE)
+    for i, key in enumerate(sorted(best)):
+        table[i] = (key, best[key][0], best[key][1])
+    np.save(path, table)
+    _books.pop(path, None)
+
+def get_book(path):
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
@@ -0,0 +1,29 @@
+from collections import namedtuple
+
+class GameConfig(namedtuple('GameConfig', ('grid_count', 'length', 'exact'))):
+    """Rules of a game: grid_count x grid_count board, win with length in a row
+
+    Freestyle by default, where any longer line also wins; with exact set only a line of exactly length stones wins.
+    Tables that depend on the rules (win lines, Zobrist keys, symmetries) are built once per size and shared.
+    """
+    __slots__ = ()
+
+    def __new__(cls, grid_count=19, length=5, exact=False):
+        return super(GameConfig, cls).__new__(cls, grid_count, length, exact)
+
+    def center(self):
+        return (self.grid_count // 2, self.grid_count // 2)
+
+    def empty_grid(self):
+        return [list('.' * self.grid_count) for i in range(self.grid_count)]
+
+DEFAULT_CONFIG = GameConfig()
+
+# --size, --length and --exact options of the command line tools, read back with config_from_args
+def add_config_arguments(parser):
+    parser.add_argument('--size', type=int, default=19, help="rows and columns of the board")
+    parser.add_argument('--length', type=int, default=5, help="stones in a row that win")
+    parser.add_argument('--exact', action='store_true', help="only exactly length stones in a row win, not longer lines")
+
+def config_from_args(args):
+    return GameConfig(args.size, args.length, args.exact)
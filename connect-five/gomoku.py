@@ -1,16 +1,17 @@
+import argparse
 import pygame
 from pygame.locals import *
 from board import *
 
 class Gomoku():
-    def __init__(self):
+    def __init__(self, config=DEFAULT_CONFIG):
         pygame.init()
-        self.screen = pygame.display.set_mode((530, 550))
+        self.board = Board(config)
+        self.screen = pygame.display.set_mode(self.board.window_size())
         pygame.display.set_caption("Gomoku")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("comicsansms",24)
         self.going = True
-        self.board = Board()
         self.auto = False
         self.semiauto = True
     def loop(self):
@@ -52,5 +53,8 @@ class Gomoku():
         pygame.display.update()
 
 if __name__ == '__main__':
-    game = Gomoku()
+    parser = argparse.ArgumentParser(description="Play connect-five.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    game = Gomoku(config_from_args(args))
     game.loop()
@@ -0,0 +1,56 @@
+from __future__ import print_function
+import argparse
+import random
+import time
+from bitboard import *
+from book import *
+from mcts import *
+
+# search every position of the first plies of games of self-play and return book entries for them
+# moves are sampled in proportion to their visits, so that the games spread over the likely openings
+def build_book(games, plies, options, config=DEFAULT_CONFIG):
+    entries = {} # canonical key -> (key, move, visits)
+    for game in range(games):
+        grid = config.empty_grid()
+        board = Bitboard(config)
+        player = 'b'
+        for ply in range(plies):
+            if board.occupied() == 0:
+                move = config.center()
+                entry = book_entry(board, move[0], move[1], 0)
+                entries.setdefault(entry[0], entry)
+            else:
+                search = MCTS(grid, player, config=config, **options)
+                root = search.search()
+                nodes = search.nodes
+                children = list(nodes.children(root))
+                visits = [int(nodes.n[nodes.stat[child]]) for child in children]
+                best = children[visits.index(max(visits))]
+                entry = book_entry(board, *search.coordinates(nodes.move[best]), visits=max(visits))
+                if entry[0] not in entries or entry[2] > entries[entry[0]][2]:
+                    entries[entry[0]] = entry
+                move = search.coordinates(nodes.move[random.choices(children, visits)[0]])
+
+            grid[move[0]][move[1]] = player
+            if board.do_move(move[0], move[1], player):
+                break
+            player = 'w' if player == 'b' else 'b'
+    return list(entries.values())
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build a connect-five opening book from searches of self-play openings.")
+    parser.add_argument('--out', default='book.npy')
+    parser.add_argument('--games', type=int, default=50)
+    parser.add_argument('--plies', type=int, default=6)
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--radius', type=int, default=2, help="expansion radius, so that the second player's first move is searched too")
+    parser.add_argument('--seed', type=int, default=0)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    start = time.time()
+    entries = build_book(args.games, args.plies, dict(iterations=args.iterations, radius=args.radius),
+                         config_from_args(args))
+    save_book(args.out, entries)
+    print("Wrote", len(entries), "positions to", args.out, "in %.1fs" % (time.time() - start))
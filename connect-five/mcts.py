@@ -1,207 +1,572 @@
 from math import sqrt, log
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 import random
-import copy
-
-class State:
-  def __init__(self, grid, player, move):
-    self.grid = grid
-    self.maxrc = len(grid)-1
-    self.grid_count = 19
-    self.grid_size = 26
-
-    # instance variables that every State node should have
-    self.options = []
-    self.player = player
-    self.children = []
-    self.reward = 0
-    self.parent = None
-    self.move = move # tuple of coordinates
-    self.game_over = False
-    self.winner = None
-    self.q = 0 # total number of wins
-    self.n = 0 # total number of visits
-
-    # load state with possible options upon initialization
-    self.get_options(self.grid)
-
-  def isTerminal(self):
-    if (self.move == None): # root state
-      return False
-
-    if (self.game_over == True or self.check_win(self.move[0], self.move[1]) == True): # if game board is filled (options exhausted) or if winning move
-      return True
-    else:
-      return False    
-
-  def fullyExpanded(self):
-    if (len(self.options) == 0): # if game board is filled (options exhausted)
-      return True
-    else:
-      return False
-
-  # calculate possible actions to take from a state
-  def get_options(self, grid):
-    opts = []
-
-    for r in range(len(grid)):
-      for c in range(len(grid)):
-        if grid[r][c] == self.player: # look at all possible pieces of player's color   
-          if ((c - 1) >= 0 and grid[r][c - 1] == '.'): # if adjacent left spot is empty
-            opts.append((r, c - 1))
-          if ((c + 1) <= self.maxrc and grid[r][c + 1] == '.'): # right spot empty
-            opts.append((r, c + 1))
-          if ((r + 1) <= self.maxrc and grid[r + 1][c] == '.'): # down spot empty
-            opts.append((r + 1, c))
-          if ((r - 1) >= 0 and grid[r - 1][c] == '.'): # up spot empty
-            opts.append((r - 1, c))
-
-    self.options = opts
-
-    if len(self.options) == 0:
-      # In the unlikely event that no one wins before board is filled
-      self.winner = '0'
-      self.game_over = True
-
-  def check_win(self, r, c):
-    n_count = self.get_continuous_count(r, c, -1, 0)
-    s_count = self.get_continuous_count(r, c, 1, 0)
-    e_count = self.get_continuous_count(r, c, 0, 1)
-    w_count = self.get_continuous_count(r, c, 0, -1)
-    se_count = self.get_continuous_count(r, c, 1, 1)
-    nw_count = self.get_continuous_count(r, c, -1, -1)
-    ne_count = self.get_continuous_count(r, c, -1, 1)
-    sw_count = self.get_continuous_count(r, c, 1, -1)
-    if (n_count + s_count + 1 >= 5) or (e_count + w_count + 1 >= 5) or \
-        (se_count + nw_count + 1 >= 5) or (ne_count + sw_count + 1 >= 5): # if a move caused a win
-      self.winner = self.grid[r][c]
-      return True
-    else:
-      return False
-
-  # see if a contiguous line of 5 pieces is on the board
-  def get_continuous_count(self, r, c, dr, dc):
-    piece = self.grid[r][c]
-    result = 0
-    i = 1
-    while True:
-      new_r = r + dr * i
-      new_c = c + dc * i
-      if 0 <= new_r < self.grid_count and 0 <= new_c < self.grid_count:
-        if self.grid[new_r][new_c] == piece:
-          result += 1
-        else:
-          break
-      else:
-        break
-      i += 1
-    return result
+import time
+import numpy as np
+from bitboard import *
+from book import *
+from batchrollout import *
+from patterns import *
+from nodestore import *
+from transposition import *
+from searchstats import *
+
+PIECES = '.bw' # player codes stored in the node arrays: 1 is black, 2 is white
+DRAW = 3 # winner code of a node where the player to move has no options left
+RESULTS = (None, 'b', 'w', '0') # winner code -> winner as used on the board, '0' for a draw
+PARALLEL_MODES = ('root', 'tree') # independent trees merged at the root, or one shared tree with rollouts in the pool
+FINAL_MOVES = ('visits', 'mean', 'uct') # ways to pick the move to play from the root children after searching
+
+LOG_TABLE_SIZE = 1 << 16
+LOG_TABLE = np.log(np.arange(1, LOG_TABLE_SIZE + 1)) # LOG_TABLE[n - 1] == log(n), for the parent visit counts seen in selection
+
+_pools = {} # process pools for parallel search, keyed by worker count and kept alive between moves
+_evaluators = {} # MCTS instances that play rollouts for tree-parallel search in a worker process, keyed by options
+
+def get_pool(workers):
+  if workers not in _pools:
+    _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+  return _pools[workers]
+
+# run one independent search in a worker process and return its root statistics
+def root_search(grid, player, options, deadline, max_nodes, seed):
+  random.seed(seed) # forked workers would otherwise share the parent's random state
+  player = MCTS(grid, player, **options)
+  player.deadline = deadline
+  player.max_nodes = max_nodes
+  player.stats = SearchStats() if player.profile else None
+  root = player.search()
+  nodes = player.nodes
+  return player.iteration_count, player.stats, int(nodes.n[nodes.stat[root]]), dict((player.coordinates(nodes.move[child]), (int(nodes.n[nodes.stat[child]]), int(nodes.q[nodes.stat[child]])))
+                                      for child in nodes.children(root))
+
+# play the rollouts of a batch of tree-parallel leaves in a worker process and return their rewards
+# every leaf is the list of (player, r, c) moves from the root position in grid to the leaf, and the player to move there
+# each reward comes with the playouts recorded for RAVE; the rollout counts come back as SearchStats when profiling
+def leaf_rollouts(grid, player, options, leaves, seed):
+  random.seed(seed)
+  key = tuple(sorted(options.items()))
+  if key not in _evaluators:
+    _evaluators[key] = MCTS(grid, player, **options)
+  evaluator = _evaluators[key]
+  if evaluator.grid != grid: # the leaves of one search all start from the same grid
+    evaluator.grid = grid
+    evaluator.board = Bitboard.from_grid(grid, evaluator.config)
+  evaluator.player = player
+  evaluator.stats = SearchStats() if evaluator.profile else None
+
+  rewards = []
+  for moves, mover in leaves:
+    for piece, r, c in moves:
+      evaluator.board.do_move(r, c, piece)
+    rewards.append((evaluator.simulate(mover), evaluator.playouts))
+    evaluator.board.undo_to(0)
+  return rewards, evaluator.stats
 
 class MCTS:
-  def __init__(self, grid, player):
+  def __init__(self, grid, player, workers=1, iterations=200, table_size=None, rollouts=1, rollout_policy='random',
+               radius=None, widening=None, widening_exponent=0.5, exploration=2 * sqrt(2), final_move='visits',
+               parallel='root', virtual_loss=1, leaf_batch=8, rave=None, book=None, config=None, profile=False):
+    if parallel not in PARALLEL_MODES:
+      raise ValueError("parallel must be one of %s, not %r" % (PARALLEL_MODES, parallel))
+    if final_move not in FINAL_MOVES:
+      raise ValueError("final_move must be one of %s, not %r" % (FINAL_MOVES, final_move))
     self.grid = grid
+    self.config = config if config != None else GameConfig(len(grid)) # board size and winning rule
+    self.workers = workers # number of worker processes when > 1
+    self.iterations = iterations # iteration count of monte carlo tree search, per worker
+    self.board = Bitboard.from_grid(grid, self.config) # working board, moved along with the search and undone after every iteration
     self.player = player
     self.winner = None
-
-  def other_player(self, state): # switch to other player for every move
-    if state.player == 'b':
-      return 'w'
-    if state.player == 'w':
-      return 'b'
+    self.nodes = NodeStore() # search tree; only the root position (self.board) is kept, other positions are replayed from moves
+    self.root = None # index of the root node, kept between moves by set_position
+    self.table = TranspositionTable(table_size) if table_size else None # statistics slots by canonical hash, shared between move orders and symmetric positions
+    self.table_size = table_size
+    self.path = [] # nodes visited by the current iteration, from the root down
+    self.rollouts = rollouts # playouts per leaf; more than one random playout are played together by the batch engine
+    self.rollout_policy = rollout_policy # 'random' among adjacent spots, or 'pattern' weighted by threat scores
+    self.batch = BatchRollout(self.config) if rollouts > 1 and rollout_policy == 'random' and rave == None else None
+    self.patterns = PatternPolicy(self.config) if rollout_policy == 'pattern' else None
+
+    # expansion policy: by default a node expands every empty spot adjacent to the player's pieces
+    self.radius = radius # expand empty spots within radius of any piece instead, so blocking moves are searched too
+    self.widening = widening # progressive widening: a node with n visits has at most widening * n ** widening_exponent children
+    self.widening_exponent = widening_exponent
+    self.scorer = PatternPolicy(self.config) if widening != None else None # priors that order expansions
+
+    self.exploration = exploration # weight of the UCT exploration term sqrt(log(N) / n)
+
+    # RAVE: every node also keeps all-moves-as-first statistics, counting each rollout in which its move was played
+    # later by the same player; they are mixed into the mean with weight sqrt(rave / (3 * n + rave)), so rave is the
+    # visit count around which the node's own statistics take over. The batch engine records no moves and is not used
+    self.rave = rave
+    self.playouts = [] # (moves from the root, reward, rollout count) of every playout of the current iteration, for RAVE
+    self.final_move = final_move # move to play: most 'visits', highest 'mean' reward, or best 'uct' value as in selection
+
+    # parallel search with workers > 1: 'root' searches one tree per worker, 'tree' grows one tree
+    # whose leaves are selected here and rolled out in the workers, leaf_batch leaves per task
+    self.parallel = parallel
+    self.virtual_loss = virtual_loss # lost visits added along the path of every leaf waiting for its rollouts
+    self.leaf_batch = leaf_batch
+
+    self.book = get_book(book) if book != None else None # opening book file consulted before searching, see makebook.py
+
+    # anytime mode: when either is set, search runs until it is used up instead of for a fixed iteration count
+    self.deadline = None # wall-clock time.time() at which to stop searching
+    self.max_nodes = None # number of new tree nodes after which to stop searching
+    self.node_count = 0 # tree nodes created by the current search
+    self.idle_count = 0 # iterations in a row that ended on a terminal node without creating one
+    self.iteration_count = 0 # iterations completed by the last search, summed over all trees
+
+    self.profile = profile # record per-phase times and counts of every move in self.stats
+    self.stats = None # SearchStats of the last make_move when profiling
+
+  def other_player(self, player): # switch to other player code for every move
+    return 3 - player
+
+  def coordinates(self, move): # cell index stored in the tree -> tuple of coordinates
+    return divmod(int(move), self.board.grid_count)
+
+  # keyword arguments that recreate this player's search settings in a worker process
+  def search_options(self):
+    return dict(iterations=self.iterations, table_size=self.table_size, rollouts=self.rollouts,
+                rollout_policy=self.rollout_policy, radius=self.radius, widening=self.widening,
+                widening_exponent=self.widening_exponent, exploration=self.exploration, final_move=self.final_move,
+                rave=self.rave, config=self.config, profile=self.profile)
 
   def uct_search(self):
-    count = 200 # iteration count of monte carlo tree search
+    if self.workers > 1 and self.parallel == 'root':
+      return self.parallel_search()
+
+    root = self.search() if self.workers == 1 else self.tree_parallel_search()
+    nodes = self.nodes
+    children = nodes.children(root)
+    stats = nodes.stat[children.start:children.stop]
+    best = self.final_choice(nodes.n[stats], nodes.q[stats], nodes.n[nodes.stat[root]])
+    return self.coordinates(nodes.move[children.start + best]) # return best move from root state
+
+  # grow a search tree from the current position and return its root
+  def search(self):
     i = 0
-
-    rootState = State(copy.deepcopy(self.grid), self.player, None)
-
-    while i < count:
-      state = self.tree_policy(rootState) # state from selection and expansion (tree policy)
-      reward = self.default_policy(state) # reward from simulation (default policy)
-      self.backup(state, reward) # back propagation from terminal node to root
+    root = self.start_search()
+    stats = self.stats
+
+    while self.budget_left(i):
+      if stats != None:
+        start = time.perf_counter()
+      node = self.tree_policy(root) # node from selection and expansion (tree policy)
+      if stats != None:
+        start = stats.lap('tree_policy', start)
+        stats.leaf(len(self.path) - 1)
+      reward = self.default_policy(node) # reward from simulation (default policy)
+      if stats != None:
+        start = stats.lap('default_policy', start)
+      self.backup(node, reward) # back propagation from terminal node to root
+      if stats != None:
+        stats.lap('backup', start)
+      self.board.undo_to(0) # take back every move played in this iteration
       i+=1
 
-    return self.best_child(rootState).move # return best move from root state
-
-  def tree_policy(self, state):
-    while not state.isTerminal(): 
-      if not state.fullyExpanded():
-        return self.expand(state) # expand state as long as it is not terminal/fully expanded
-      else:
-        state = self.best_child(state) # if state is fully expanded, select best child
-    return state
-
-  def expand(self, state):
-    action = self.take_action(state) 
-
-    newGrid = copy.deepcopy(state.grid)
-    newGrid[action[0]][action[1]] = state.player
-
-    newState = State(newGrid, self.other_player(state), action)
+    self.iteration_count = i
+    if stats != None:
+      stats.tree(self)
+    return root
+
+  def start_search(self):
+    self.node_count = 0
+    self.idle_count = 0
+    if self.root == None:
+      self.nodes = NodeStore()
+      self.root = self.nodes.add_root(PIECES.index(self.player), self.lookup_stat())
+    return self.root
+
+  # tree parallelization: grow one tree while the worker processes play the rollouts of its leaves
+  # selection needs the working board and runs here, so a new batch of leaves is selected while others are rolled out;
+  # virtual loss on the paths of pending leaves steers the next selections elsewhere
+  def tree_parallel_search(self):
+    pool = get_pool(self.workers)
+    options = self.search_options()
+    root = self.start_search()
+    selected = 0 # leaves selected so far, iterations completed once backed up
+    done = 0
+    pending = {} # future -> statistics slots and nodes of the path of each of its leaves
+    stats = self.stats
+
+    def budget_left(): # the iteration count is shared by the workers of the one tree
+      if self.deadline == None and self.max_nodes == None:
+        return selected < self.iterations * self.workers
+      return self.budget_left(selected)
+
+    while pending or budget_left():
+      while len(pending) < self.workers and budget_left():
+        leaves = []
+        paths = []
+        while len(leaves) < self.leaf_batch and budget_left():
+          if stats != None:
+            start = time.perf_counter()
+          node = self.tree_policy(root)
+          if stats != None:
+            stats.lap('tree_policy', start)
+            stats.leaf(len(self.path) - 1)
+          selected += 1
+          slots = self.nodes.stat[self.path]
+          if self.nodes.winner[node] != 0: # terminal leaves need no rollouts
+            self.backup(node, self.default_policy(node))
+            done += 1
+          else:
+            self.nodes.n[slots] += self.virtual_loss
+            leaves.append((list(self.board.history), PIECES[self.nodes.player[node]]))
+            paths.append((slots, self.path))
+          self.board.undo_to(0)
+        if leaves:
+          pending[pool.submit(leaf_rollouts, self.grid, self.player, options, leaves, random.getrandbits(32))] = paths
+      if not pending:
+        break
 
-    newState.parent = state # state is parent of newState
-    state.children.append(newState) # newState is child of parent state
+      if stats != None:
+        start = time.perf_counter()
+      finished, waiting = wait(pending, return_when=FIRST_COMPLETED)
+      if stats != None:
+        start = stats.lap('default_policy', start)
+      for future in finished:
+        rewards, rollout_stats = future.result()
+        for (slots, path), (reward, playouts) in zip(pending.pop(future), rewards):
+          self.nodes.n[slots] += self.rollouts - self.virtual_loss
+          self.nodes.q[slots] += reward
+          if self.rave != None:
+            self.update_amaf(path, playouts)
+          done += 1
+        if stats != None:
+          stats.merge(rollout_stats)
+      if stats != None:
+        stats.lap('backup', start)
+
+    self.iteration_count = done
+    if stats != None:
+      stats.tree(self)
+    return root
+
+  # move the search onto the position in grid, with player to move
+  # the subtree reached by our last move and the opponent's reply is kept along with its statistics
+  def set_position(self, grid, player):
+    self.grid = grid
 
-    return newState
+    placed = {} # new stones on the grid, by color
+    for r in range(len(grid)):
+      for c in range(len(grid)):
+        if grid[r][c] != self.board.get(r, c):
+          if grid[r][c] == '.' or grid[r][c] in placed: # stones were removed or the order of moves is ambiguous
+            placed = None
+            break
+          placed[grid[r][c]] = (r, c)
+      if placed == None:
+        break
 
-  def best_child(self, state):
-    maxValue = 0
-    bestChild = 0
-    tempState = None
+    # follow the new moves down the tree, starting with the player who was to move at the root
+    node = self.root if self.root != None else -1
+    mover = self.player
+    moves = []
+    while placed and node >= 0:
+      move = placed.pop(mover, None)
+      node = self.nodes.find_child(node, move[0] * self.board.grid_count + move[1]) if move != None else -1
+      moves.append((move, mover))
+      mover = 'w' if mover == 'b' else 'b'
+
+    if placed == None or placed or node < 0 or mover != player:
+      # no reusable subtree, start over from the grid
+      self.board = Bitboard.from_grid(grid, self.config)
+      self.root = None
+      if self.table != None:
+        self.table.clear()
+    else:
+      for move, mover in moves:
+        self.board.do_move(move[0], move[1], mover)
+      self.board.history = [] # the new root position cannot be undone
+      self.nodes, slots = self.nodes.extract(node) # keep only the subtree, so the rest of the old tree is freed
+      self.root = 0
+      if self.table != None:
+        self.table.remap(slots)
 
-    for child in state.children: # for all children of given state
-      bestChild = (child.q)/(child.n) + 2 * sqrt((2 * log(state.n))/(child.n)) # calculate best child value for each state
+    self.player = player
 
-      if (bestChild > maxValue): # find state with max best child value
-        maxValue = bestChild
-        tempState = child
-    
-    return tempState
+  def budget_left(self, i):
+    if self.deadline == None and self.max_nodes == None:
+      return i < self.iterations
 
-  def default_policy(self, state):
-    tempState = State(copy.deepcopy(state.grid), state.player, state.move) # start simulation with tempState
+    if i == 0: # always run one iteration so that there is a move to return
+      return True
+    if self.deadline != None and time.time() >= self.deadline:
+      return False
+    if self.max_nodes != None and self.node_count >= self.max_nodes:
+      return False
+    if self.max_nodes != None and self.idle_count >= self.max_nodes: # the tree cannot grow any more, or only ever reaches decided positions
+      return False
+    return True
+
+  # root parallelization: search independent trees in a process pool and merge their root children
+  def parallel_search(self):
+    pool = get_pool(self.workers)
+    futures = [pool.submit(root_search, self.grid, self.player, self.search_options(), self.deadline, self.max_nodes,
+                           random.getrandbits(32))
+               for i in range(self.workers)]
+
+    total = 0
+    self.iteration_count = 0
+    stats = {} # move -> [visits, wins] summed over all trees
+    for future in futures:
+      iterations, tree_stats, n, children = future.result()
+      self.iteration_count += iterations
+      if self.stats != None:
+        self.stats.merge(tree_stats)
+      total += n
+      for move, (child_n, child_q) in children.items():
+        merged = stats.setdefault(move, [0, 0])
+        merged[0] += child_n
+        merged[1] += child_q
+
+    # pick the move by the merged statistics, as uct_search does for one tree
+    moves = list(stats)
+    merged = np.array([stats[move] for move in moves]).reshape(-1, 2)
+    return moves[self.final_choice(merged[:, 0], merged[:, 1], total)]
+
+  # statistics slot for the position on the board: shared through the transposition table, or a fresh one
+  def lookup_stat(self):
+    if self.table == None:
+      return None
+    key = self.board.canonical()[0]
+    stat = self.table.get(key)
+    if stat == None:
+      stat = self.nodes.new_stat()
+      self.table.put(key, stat)
+    return stat
+
+  def isTerminal(self, node):
+    return self.nodes.winner[node] != 0 # winning move or no options left
+
+  def fullyExpanded(self, node):
+    # every candidate move already has a child, or widening allows no more yet; the board is positioned at node
+    count = self.nodes.child_count[node]
+    if self.widening != None and count >= self.widening_limit(node):
+      return True
+    return self.nodes.first_child[node] >= 0 and count >= self.nodes.option_count[node] # a node that is not terminal has some candidate
+
+  # number of children progressive widening allows the node at its visit count
+  def widening_limit(self, node):
+    return max(1, int(self.widening * self.nodes.n[self.nodes.stat[node]] ** self.widening_exponent))
+
+  # candidate moves for the player to move, with the board positioned at the node
+  def candidates(self, player):
+    if self.radius == None:
+      return list(self.board.frontier[player])
+    return self.board.cells(self.board.region(self.radius))
+
+  # reserve child slots for a node whose reserved slots are all used, with the moves of the new slots set in the
+  # order they are expanded: most promising first by threats made or blocked when widening, random otherwise
+  # without widening every candidate gets a slot at once; with it only as many as widening allows, doubling the
+  # block whenever it fills up, so nodes do not hold slots for the many moves they never expand
+  def reserve_options(self, node):
+    nodes = self.nodes
+    player = PIECES[nodes.player[node]]
+    options = self.candidates(player)
+    count = int(nodes.child_count[node])
+    nodes.option_count[node] = len(options)
+    if self.widening == None:
+      random.shuffle(options)
+      slots = len(options)
+    else:
+      if count: # the moves of the block so far were the first in this order, skip them
+        tried = set(nodes.move[nodes.first_child[node]:nodes.first_child[node] + count].tolist())
+        options = [move for move in options if move[0] * self.board.grid_count + move[1] not in tried]
+      options.sort(key=lambda move: -self.scorer.score(self.board, move[0], move[1], player))
+      slots = min(count + len(options), max(2 * count, self.widening_limit(node)))
+    nodes.reserve_children(node, slots)
+    first = nodes.first_child[node]
+    nodes.move[first + count:first + slots] = [r * self.board.grid_count + c for r, c in options[:slots - count]]
+
+  def tree_policy(self, node):
+    self.path = [node]
+    while not self.isTerminal(node):
+      if not self.fullyExpanded(node):
+        start = time.perf_counter() if self.stats != None else None
+        node = self.expand(node) # expand node as long as it is not terminal/fully expanded
+        if start != None:
+          self.stats.lap('expand', start)
+        self.path.append(node)
+        self.idle_count = 0
+        return node
+      else:
+        child = self.best_child(node) # if node is fully expanded, select best child
+        r, c = self.coordinates(self.nodes.move[child])
+        self.board.do_move(r, c, PIECES[self.nodes.player[node]])
+        node = child
+        self.path.append(node)
+    self.idle_count += 1
+    return node
+
+  def expand(self, node):
+    player = int(self.nodes.player[node])
+    if self.nodes.child_count[node] == self.nodes.child_slots[node]: # no untried move left in the reserved slots
+      self.reserve_options(node)
+    action = self.take_action(node)
+
+    won = self.board.do_move(action[0], action[1], PIECES[player])
+
+    nextPlayer = self.other_player(player)
+    if won:
+      winner = player
+    elif len(self.candidates(PIECES[nextPlayer])) == 0:
+      winner = DRAW # In the unlikely event that no one wins before board is filled
+    else:
+      winner = 0
+
+    self.node_count += 1
+    return self.nodes.add_child(node, action[0] * self.board.grid_count + action[1], nextPlayer, winner, self.lookup_stat())
+
+  # UCT value q/n + exploration * sqrt(log(parentN)/n) of every child; unvisited children come first
+  # with RAVE, the AMAF visits and rewards amaf_n and amaf_q are blended into the mean
+  def uct_values(self, n, q, parentN, amaf_n=None, amaf_q=None):
+    logN = LOG_TABLE[parentN - 1] if 0 < parentN <= LOG_TABLE_SIZE else log(max(parentN, 1))
+    visited = np.maximum(n, 1)
+    mean = q / visited
+    if amaf_n is not None:
+      beta = np.where(amaf_n > 0, np.sqrt(self.rave / (3.0 * n + self.rave)), 0)
+      mean = (1 - beta) * mean + beta * (amaf_q / np.maximum(amaf_n, 1))
+    values = mean + (self.exploration * sqrt(logN)) / np.sqrt(visited)
+    values[n == 0] = np.inf
+    return values
+
+  def best_child(self, node):
+    # the children are one block of slots, so their statistics are gathered and scored in one go
+    nodes = self.nodes
+    first = nodes.first_child[node]
+    last = first + nodes.child_count[node]
+    stats = nodes.stat[first:last]
+    if self.rave != None:
+      values = self.uct_values(nodes.n[stats], nodes.q[stats], nodes.n[nodes.stat[node]], nodes.amaf_n[first:last], nodes.amaf_q[first:last])
+    else:
+      values = self.uct_values(nodes.n[stats], nodes.q[stats], nodes.n[nodes.stat[node]])
+    return first + int(np.argmax(values))
+
+  # index of the move to play among root children with visits n and rewards q, by self.final_move
+  def final_choice(self, n, q, parentN):
+    if self.final_move == 'uct':
+      return int(np.argmax(self.uct_values(n, q, parentN)))
+    if self.final_move == 'mean':
+      return int(np.argmax(np.where(n > 0, q / np.maximum(n, 1), -1)))
+    return int(np.argmax(n))
+
+  # reward of the node's rollouts: the number of them won by self.player
+  def default_policy(self, node):
+    winner = RESULTS[self.nodes.winner[node]]
+    if winner != None: # node is terminal, every rollout ends here
+      reward = self.rollouts if winner == self.player else 0
+      self.playouts = [(list(self.board.history), reward, self.rollouts)] if self.rave != None else []
+      return reward
+    return self.simulate(PIECES[self.nodes.player[node]])
+
+  # play self.rollouts rollouts from the board with player to move and return the number won by self.player
+  def simulate(self, player):
+    if self.batch != None: # play all of the node's rollouts at once
+      winners = self.batch.run(self.board, player, self.rollouts)
+      if self.stats != None:
+        self.stats.rollouts += self.rollouts
+        self.stats.rollout_moves += self.batch.moves
+      return int((winners == PIECES.index(self.player)).sum())
+
+    reward = 0
+    ply = len(self.board.history)
+    self.playouts = []
+    for i in range(self.rollouts):
+      won = self.rollout(player)
+      reward += won
+      if self.rave != None:
+        self.playouts.append((list(self.board.history), won, 1))
+      if self.stats != None:
+        self.stats.rollouts += 1
+        self.stats.rollout_moves += len(self.board.history) - ply
+      self.board.undo_to(ply)
+    return reward
+
+  def rollout(self, player):
+    winner = None
+
+    while winner == None: # rollout simulation from the board until a player wins or has no options
+      options = self.board.frontier[player]
+      if len(options) == 0:
+        winner = '0'
+        break
 
-    while not tempState.isTerminal(): # rollout simulation from tempState until node is terminal
-       action = self.take_action(tempState) 
+      if self.patterns != None:
+        action = self.patterns.choose(self.board, player) # adjacent spot weighted by the threats it makes or blocks
+      else:
+        action = options.choice() # random empty spot adjacent to player's pieces
+      if self.board.do_move(action[0], action[1], player):
+        winner = player
 
-       newGrid = copy.deepcopy(tempState.grid)
-       newGrid[action[0]][action[1]] = tempState.player
+      player = 'w' if player == 'b' else 'b'
 
-       tempState = State(newGrid, self.other_player(state), action)
-    
     # return reward of state at end
-    if (tempState.winner == self.player):
+    if (winner == self.player):
       return 1
     else:
       return 0
 
-  def take_action(self, state):
-    # randomly picked action from options list
-    m = random.randint(0, len(state.options)-1)
-    moveToTake = state.options[m] 
-
-    del state.options[m] # delete action from options list
-    return moveToTake
+  def take_action(self, node):
+    # randomly picked candidate that has no child yet, or the best one by prior when widening:
+    # the untried moves wait in the free reserved slots in that order, so this is the first of them
+    return self.coordinates(self.nodes.move[self.nodes.first_child[node] + self.nodes.child_count[node]])
 
   # returns move that is used in board.py
-  def make_move(self):
-    check = True
-
-    # check if entire board is empty
-    for i in range(len(self.grid)):
-      for j in range(len(self.grid[i])):
-        if (self.grid[i][j] != '.'):
-          check = False
-          break
-    
-    if (check == True): # if board is empty, place first move at center
-      return (9, 9) 
+  # time_limit (seconds) and max_nodes switch to anytime search; iteration_count holds the iterations it completed
+  def make_move(self, time_limit=None, max_nodes=None):
+    self.deadline = time.time() + time_limit if time_limit != None else None
+    self.max_nodes = max_nodes
+    self.iteration_count = 0
+    self.stats = SearchStats() if self.profile else None
+    start = time.perf_counter()
+
+    move = self.book.lookup(self.board) if self.book != None else None
+    if move != None: # known opening position, no search needed
+      pass
+    elif (self.board.occupied() == 0): # if board is empty, place first move at center
+      move = self.config.center()
+    elif len(self.candidates(self.player)) == 0: # player has no pieces to search from yet, play next to the opponent's
+      move = self.board.frontier['w' if self.player == 'b' else 'b'].choice()
     else:
-      return self.uct_search() # if board not empty, run uctsearch algorithm
-
-  def backup(self, state, reward):    
-    while state != None:
-      # update values
-      state.n += 1 
-      state.q += reward
-      
-      state = state.parent # backpropagate up to root
\ No newline at end of file
+      move = self.uct_search() # if board not empty, run uctsearch algorithm
+
+    if self.stats != None:
+      self.stats.iterations = self.iteration_count
+      self.stats.total_seconds = time.perf_counter() - start
+    return move
+
+  def backup(self, node, reward):
+    # backpropagate along the path taken from the root; nodes sharing a statistics slot are all updated
+    stats = self.nodes.stat[self.path]
+    self.nodes.n[stats] += self.rollouts # every playout counts as a visit
+    self.nodes.q[stats] += reward
+    if self.rave != None:
+      self.update_amaf(self.path, self.playouts)
+
+  # credit the AMAF statistics of the children of every node on path whose move was played from there on, by the
+  # player to move at that node, in the playout; a cell is played at most once per playout
+  def update_amaf(self, path, playouts):
+    nodes = self.nodes
+    size = self.board.grid_count * self.board.grid_count
+    for moves, reward, count in playouts:
+      ply = np.full(size, -1, np.int32) # ply at which each cell was played
+      mover = np.zeros(size, np.int8) # code of the player who played it
+      for i, (piece, r, c) in enumerate(moves):
+        cell = r * self.board.grid_count + c
+        ply[cell] = i
+        mover[cell] = PIECES.index(piece)
+
+      for depth, node in enumerate(path): # node at depth is the position after moves[:depth]
+        first = nodes.first_child[node]
+        if first < 0:
+          continue
+        last = first + nodes.child_count[node]
+        cells = nodes.move[first:last]
+        played = (ply[cells] >= depth) & (mover[cells] == nodes.player[node])
+        nodes.amaf_n[first:last][played] += count
+        nodes.amaf_q[first:last][played] += reward
@@ -0,0 +1,34 @@
+import random
+
+class MoveSet:
+    """Set of moves backed by a list, with O(1) add, remove and random pick"""
+    def __init__(self, moves=()):
+        self.items = [] # moves in no particular order
+        self.index = {} # position of each move in items
+        for move in moves:
+            self.add(move)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, move):
+        return move in self.index
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def add(self, move):
+        if move not in self.index:
+            self.index[move] = len(self.items)
+            self.items.append(move)
+
+    def discard(self, move):
+        i = self.index.pop(move, None)
+        if i != None:
+            last = self.items.pop()
+            if i < len(self.items): # move the last item into the freed slot
+                self.items[i] = last
+                self.index[last] = i
+
+    def choice(self):
+        return self.items[random.randint(0, len(self.items)-1)]
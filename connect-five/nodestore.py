@@ -0,0 +1,114 @@
+import numpy as np
+
+class NodeStore:
+    """MCTS tree kept as struct-of-arrays: node i is entry i of every per-node array
+
+    The children of a node sit in one contiguous block of slots, reserved when the node is first expanded,
+    so their statistics can be gathered and compared in one vectorized step. A node whose block is full can get a
+    larger one at the end of the arrays; the slots it leaves behind stay unused until the tree is extracted.
+    """
+    NODE_FIELDS = (('parent', np.int32, -1), ('move', np.int32, -1), ('player', np.int8, 0), ('winner', np.int8, 0),
+                   ('first_child', np.int32, -1), ('child_count', np.int32, 0), ('child_slots', np.int32, 0),
+                   ('option_count', np.int32, -1), ('stat', np.int32, -1), ('amaf_n', np.int32, 0), ('amaf_q', np.int32, 0))
+    STAT_FIELDS = (('n', np.int32, 0), ('q', np.int32, 0))
+
+    def __init__(self, capacity=1024):
+        self.size = 0 # node slots in use, including reserved slots of children not expanded yet
+        self.stat_size = 0 # statistics slots in use; nodes reached by transposition share one slot
+        for name, dtype, fill in self.NODE_FIELDS + self.STAT_FIELDS:
+            setattr(self, name, np.full(capacity, fill, dtype))
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name, dtype, fill in self.NODE_FIELDS + self.STAT_FIELDS)
+
+    def grow(self, fields, used):
+        # at least double the arrays of fields when they cannot hold used entries
+        for name, dtype, fill in fields:
+            array = getattr(self, name)
+            if used > len(array):
+                setattr(self, name, np.concatenate([array, np.full(max(len(array), used - len(array)), fill, dtype)]))
+
+    def new_stat(self):
+        self.grow(self.STAT_FIELDS, self.stat_size + 1)
+        self.stat_size += 1
+        return self.stat_size - 1
+
+    def add_root(self, player, stat=None):
+        self.grow(self.NODE_FIELDS, self.size + 1)
+        node = self.size
+        self.size += 1
+        self.player[node] = player
+        self.stat[node] = self.new_stat() if stat == None else stat
+        return node
+
+    # reserve a block of count child slots below node, moving the children it has already into the new block
+    def reserve_children(self, node, count):
+        self.grow(self.NODE_FIELDS, self.size + count)
+        first = self.size
+        old = int(self.first_child[node])
+        used = int(self.child_count[node])
+        if old >= 0:
+            for name, dtype, fill in self.NODE_FIELDS:
+                array = getattr(self, name)
+                array[first:first + used] = array[old:old + used]
+            for child in range(first, first + used): # grandchildren point back at the moved children
+                if self.first_child[child] >= 0:
+                    self.parent[self.first_child[child]:self.first_child[child] + self.child_slots[child]] = child
+        self.first_child[node] = first
+        self.child_slots[node] = count
+        self.parent[first:first + count] = node
+        self.size += count
+
+    # fill the next reserved child slot of parent and return its index
+    def add_child(self, parent, move, player, winner, stat=None):
+        node = self.first_child[parent] + self.child_count[parent]
+        self.child_count[parent] += 1
+        self.move[node] = move
+        self.player[node] = player
+        self.winner[node] = winner
+        self.stat[node] = self.new_stat() if stat == None else stat
+        return node
+
+    def children(self, node):
+        first = int(self.first_child[node])
+        return range(first, first + int(self.child_count[node]))
+
+    def find_child(self, node, move):
+        first = int(self.first_child[node])
+        found = np.flatnonzero(self.move[first:first + int(self.child_count[node])] == move)
+        return first + int(found[0]) if len(found) else -1
+
+    # copy the subtree under root into a new store, where root becomes node 0
+    # returns the new store and a map from old to new statistics slots
+    def extract(self, root):
+        # breadth first from root, so every block of child slots stays contiguous and parents come before their
+        # children; slots left behind by blocks that moved are not reached
+        level = np.array([root])
+        levels = [level]
+        while len(level):
+            parents = level[self.first_child[level] >= 0]
+            first = self.first_child[parents]
+            slots = self.child_slots[parents]
+            level = np.repeat(first - (np.cumsum(slots) - slots), slots) + np.arange(int(slots.sum()))
+            levels.append(level)
+        keep = np.concatenate(levels)
+
+        index = np.full(self.size, -1, np.int32) # new index of every kept node
+        index[keep] = np.arange(len(keep))
+        count = len(keep)
+        stat = self.stat[keep]
+        slots, renamed = np.unique(stat[stat >= 0], return_inverse=True) # reserved slots have no statistics yet
+
+        store = NodeStore(max(1024, count))
+        store.size = count
+        store.stat_size = len(slots)
+        for name, dtype, fill in self.NODE_FIELDS:
+            getattr(store, name)[:count] = getattr(self, name)[keep]
+        for name in ('parent', 'first_child'):
+            links = getattr(store, name)[:count]
+            links[:] = np.where(links >= 0, index[links], -1)
+        store.parent[0] = -1
+        store.stat[:count][stat >= 0] = renamed
+        for name, dtype, fill in self.STAT_FIELDS:
+            getattr(store, name)[:len(slots)] = getattr(self, name)[slots]
+        return store, dict(zip(slots.tolist(), range(len(slots))))
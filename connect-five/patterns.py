@@ -0,0 +1,33 @@
+import random
+from winlines import *
+from config import *
+
+def pattern_table(length=5):
+    # score of one line through a candidate cell, indexed by [own stones][opponent stones] already on the line
+    # a line holding both colors can never be completed and scores 0
+    table = [[0] * (length + 1) for i in range(length + 1)]
+    for k in range(length):
+        table[k][0] = 4 ** (2 * k) # extend own line: 1, 16, 256 (open three), 4096 (four), 65536 (five)
+        table[0][k] = max(1, 4 ** (2 * k) // 2) # block opponent's line, worth half of making the same line
+    return table
+
+class PatternPolicy:
+    """Rollout policy that picks moves in proportion to threat scores from a line pattern table"""
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.lines = get_win_lines(config.grid_count, config.length)
+        self.table = pattern_table(config.length)
+
+    # sum of the pattern scores of every line through (r, c) for player
+    def score(self, board, r, c, player):
+        own = board.lines.counts[player]
+        opp = board.lines.counts['w' if player == 'b' else 'b']
+        table = self.table
+        total = 0
+        for line in self.lines.cell_lines[r * self.lines.grid_count + c]:
+            total += table[own[line]][opp[line]]
+        return total
+
+    def choose(self, board, player):
+        options = board.frontier[player].items
+        weights = [1 + self.score(board, r, c, player) for r, c in options] # every option keeps some chance
+        return random.choices(options, weights)[0]
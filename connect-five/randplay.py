@@ -1,83 +1,77 @@
 import random
+from winlines import *
+from moveset import *
+from config import *
 
 class Randplay:
-    def __init__(self, grid, player):
+    def __init__(self, grid, player, config=None):
         self.grid = grid
-        self.maxrc = len(grid)-1
+        self.config = config if config != None else GameConfig(len(grid)) #board size and winning rule
+        self.maxrc = self.config.grid_count-1
         self.piece = player
-        self.grid_size = 26
-        self.grid_count = 19
+        self.grid_count = self.config.grid_count
         self.game_over = False
         self.winner = None
-        
-    def get_options(self, grid):
-        #collect all occupied spots
-        current_pcs = []
+        self.lines = WinTracker(self.grid_count, self.config.length, self.config.exact) # per-line piece counts for win detection
+        #Kept up to date by update(), so a move never rescans the grid
+        self.occupied = 0 #bit (r * len(grid) + c) is set for every piece on the grid
+        self.bounds = None #(min_r, max_r, min_c, max_c) of the pieces, grown by one cell on each side
+        self.options = MoveSet() #empty spots inside bounds
         for r in range(len(grid)):
             for c in range(len(grid)):
                 if not grid[r][c] == '.':
-                    current_pcs.append((r,c))
-        #At the beginning of the game, current_pcs is empty
-        if not current_pcs:
-            return [(int(self.maxrc/2), int(self.maxrc/2))]
+                    self.update(r, c, grid[r][c])
+
+    #Record a piece placed on the grid, by this player or by anyone else
+    def update(self, r, c, piece):
+        self.occupied |= 1 << (r * len(self.grid) + c)
+        self.lines.place(r, c, piece)
+        self.options.discard((r, c))
         #Reasonable moves should be close to where the current pieces are
-        #Think about what these calculations are doing
-        #min(list, key=lambda x: x[0]) picks the element with the min value on the first dimension
-        min_r = max(0, min(current_pcs, key=lambda x: x[0])[0]-1)
-        max_r = min(self.maxrc, max(current_pcs, key=lambda x: x[0])[0]+1)
-        min_c = max(0, min(current_pcs, key=lambda x: x[1])[1]-1)
-        max_c = min(self.maxrc, max(current_pcs, key=lambda x: x[1])[1]+1)
-        #Options of reasonable next step moves
-        options = []
-        for i in range(min_r, max_r+1):
-            for j in range(min_c, max_c+1):
-                if not (i, j) in current_pcs:
-                    options.append((i,j))
-        if len(options) == 0:
+        new_bounds = (max(0, r-1), min(self.maxrc, r+1), max(0, c-1), min(self.maxrc, c+1))
+        if self.bounds == None:
+            old = None
+        else:
+            old = self.bounds
+            new_bounds = (min(old[0], new_bounds[0]), max(old[1], new_bounds[1]),
+                          min(old[2], new_bounds[2]), max(old[3], new_bounds[3]))
+        if new_bounds != old:
+            #Only the strip the bounds grew by has to be added
+            for i in range(new_bounds[0], new_bounds[1]+1):
+                if old == None or not old[0] <= i <= old[1]:
+                    columns = list(range(new_bounds[2], new_bounds[3]+1))
+                else:
+                    columns = list(range(new_bounds[2], old[2])) + list(range(old[3]+1, new_bounds[3]+1))
+                for j in columns:
+                    if not self.occupied >> (i * len(self.grid) + j) & 1:
+                        self.options.add((i, j))
+            self.bounds = new_bounds
+
+    def get_options(self, grid):
+        #At the beginning of the game, there are no pieces
+        if self.bounds == None:
+            return [(int(self.maxrc/2), int(self.maxrc/2))]
+        if len(self.options) == 0:
             #In the unlikely event that no one wins before board is filled
             #Make white win since black moved first
             self.game_over = True
             self.winner = 'w'
-        return options
+        return list(self.options)
     def make_move(self):
-        options = self.get_options(self.grid)
-        m = random.randint(0,len(options)-1)
-        return options[m]
+        if self.bounds == None:
+            return (int(self.maxrc/2), int(self.maxrc/2))
+        return self.options.choice()
     def check_win(self, r, c):
-        n_count = self.get_continuous_count(r, c, -1, 0)
-        s_count = self.get_continuous_count(r, c, 1, 0)
-        e_count = self.get_continuous_count(r, c, 0, 1)
-        w_count = self.get_continuous_count(r, c, 0, -1)
-        se_count = self.get_continuous_count(r, c, 1, 1)
-        nw_count = self.get_continuous_count(r, c, -1, -1)
-        ne_count = self.get_continuous_count(r, c, -1, 1)
-        sw_count = self.get_continuous_count(r, c, 1, -1)
-        if (n_count + s_count + 1 >= 5) or (e_count + w_count + 1 >= 5) or \
-                (se_count + nw_count + 1 >= 5) or (ne_count + sw_count + 1 >= 5):
+        if self.lines.check_win(r, c, self.grid[r][c]):
             self.winner = self.grid[r][c]
             self.game_over = True
     def set_piece(self, r, c):
         if self.grid[r][c] == '.':
             self.grid[r][c] = self.piece
+            self.update(r, c, self.piece)
             if self.piece == 'b':
                 self.piece = 'w'
             else:
                 self.piece = 'b'
             return True
         return False
-    def get_continuous_count(self, r, c, dr, dc):
-        piece = self.grid[r][c]
-        result = 0
-        i = 1
-        while True:
-            new_r = r + dr * i
-            new_c = c + dc * i
-            if 0 <= new_r < self.grid_count and 0 <= new_c < self.grid_count:
-                if self.grid[new_r][new_c] == piece:
-                    result += 1
-                else:
-                    break
-            else:
-                break
-            i += 1
-        return result
\ No newline at end of file
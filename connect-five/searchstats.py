@@ -0,0 +1,56 @@
+from time import perf_counter
+
+PHASES = ('tree_policy', 'expand', 'default_policy', 'backup') # tree_policy time includes the expand time
+
+class SearchStats:
+    """Time and counts of the phases of one MCTS move, kept when the player is created with profile=True
+
+    In tree-parallel search default_policy is the time spent waiting for the rollouts of the workers.
+    """
+    def __init__(self):
+        self.seconds = dict((phase, 0.0) for phase in PHASES)
+        self.calls = dict((phase, 0) for phase in PHASES)
+        self.total_seconds = 0.0 # whole make_move call
+        self.iterations = 0
+        self.nodes = 0 # tree nodes created
+        self.rollouts = 0
+        self.rollout_moves = 0 # moves played by all rollouts
+        self.depth = 0 # depth of the leaves reached by tree_policy, summed over iterations
+        self.max_depth = 0
+        self.tree_bytes = 0 # size of the node arrays after the search, summed over trees
+        self.table_entries = 0 # transposition table entries after the search
+
+    # add the time since start to phase and return the current time
+    def lap(self, phase, start):
+        now = perf_counter()
+        self.seconds[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def leaf(self, depth):
+        self.depth += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    # record the size of a finished search tree
+    def tree(self, search):
+        self.nodes += search.node_count
+        self.tree_bytes += search.nodes.nbytes()
+        self.table_entries += len(search.table) if search.table != None else 0
+
+    # add the counts of a search run elsewhere, such as in a worker process
+    def merge(self, other):
+        for phase in other.seconds:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + other.seconds[phase]
+            self.calls[phase] = self.calls.get(phase, 0) + other.calls[phase]
+        for name in ('nodes', 'rollouts', 'rollout_moves', 'depth', 'tree_bytes', 'table_entries'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.max_depth = max(self.max_depth, other.max_depth)
+
+    def as_dict(self):
+        leaves = self.calls['tree_policy']
+        return {'seconds': dict(self.seconds), 'calls': dict(self.calls), 'total_seconds': self.total_seconds,
+                'iterations': self.iterations, 'nodes': self.nodes, 'rollouts': self.rollouts,
+                'rollout_length': self.rollout_moves / float(self.rollouts) if self.rollouts else 0.0,
+                'mean_depth': self.depth / float(leaves) if leaves else 0.0, 'max_depth': self.max_depth,
+                'tree_bytes': self.tree_bytes, 'table_entries': self.table_entries}
@@ -0,0 +1,18 @@
+_symmetries = {} # cell permutations of the 8 board symmetries, keyed by grid_count
+
+def get_symmetries(grid_count=19):
+    # symmetry s maps cell r * grid_count + c to symmetries[s][cell]: transpose if s & 4, then flip rows if s & 1
+    # and columns if s & 2; symmetry 0 is the identity
+    if grid_count not in _symmetries:
+        last = grid_count - 1
+        tables = []
+        for s in range(8):
+            table = []
+            for r in range(grid_count):
+                for c in range(grid_count):
+                    nr, nc = (c, r) if s & 4 else (r, c)
+                    nr, nc = (last - nr if s & 1 else nr), (last - nc if s & 2 else nc)
+                    table.append(nr * grid_count + nc)
+            tables.append(table)
+        _symmetries[grid_count] = tables
+    return _symmetries[grid_count]
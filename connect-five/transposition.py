@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+class TranspositionTable:
+    """Bounded map from position hash to search statistics, evicting the least recently used entry"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value != None:
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    # keep only the entries whose value is in mapping, renamed to the mapped value
+    def remap(self, mapping):
+        entries = OrderedDict()
+        for key, value in self.entries.items():
+            if value in mapping:
+                entries[key] = mapping[value]
+        self.entries = entries
@@ -0,0 +1,76 @@
+_tables = {} # WinLines shared between trackers, keyed by (grid_count, length)
+
+class WinLines:
+    """Every line of `length` cells on the board, and the lines passing through each cell"""
+    def __init__(self, grid_count=19, length=5):
+        self.grid_count = grid_count
+        self.length = length
+        self.masks = [] # bitboard mask of every line
+        self.cell_lines = [[] for i in range(grid_count * grid_count)] # ids of the lines through each cell
+        self.neighbours = [] # ids of the lines one cell before and after each line in its direction, -1 off the board
+
+        starts = {} # (direction, first cell) -> line id
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)): # east, south, south-east, south-west
+            for r in range(grid_count):
+                for c in range(grid_count):
+                    end_r = r + dr * (length - 1)
+                    end_c = c + dc * (length - 1)
+                    if not (0 <= end_r < grid_count and 0 <= end_c < grid_count):
+                        continue
+                    line = len(self.masks)
+                    starts[(dr, dc, r, c)] = line
+                    mask = 0
+                    for i in range(length):
+                        idx = (r + dr * i) * grid_count + (c + dc * i)
+                        mask |= 1 << idx
+                        self.cell_lines[idx].append(line)
+                    self.masks.append(mask)
+
+        for (dr, dc, r, c), line in sorted(starts.items(), key=lambda item: item[1]):
+            self.neighbours.append((starts.get((dr, dc, r - dr, c - dc), -1), starts.get((dr, dc, r + dr, c + dc), -1)))
+
+def get_win_lines(grid_count=19, length=5):
+    key = (grid_count, length)
+    if key not in _tables:
+        _tables[key] = WinLines(grid_count, length)
+    return _tables[key]
+
+class WinTracker:
+    """Per-line piece counts of both players, updated as stones are placed and removed
+
+    With exact set, a full line only wins if neither neighbouring line is full too, so overlines do not win.
+    """
+    def __init__(self, grid_count=19, length=5, exact=False):
+        self.lines = get_win_lines(grid_count, length)
+        self.exact = exact
+        self.counts = {'b': [0] * len(self.lines.masks), 'w': [0] * len(self.lines.masks)}
+
+    # add a stone and return True if it completes a line
+    def place(self, r, c, player):
+        counts = self.counts[player]
+        won = False
+        for line in self.lines.cell_lines[r * self.lines.grid_count + c]:
+            counts[line] += 1
+            if counts[line] == self.lines.length:
+                won = True
+        if won and self.exact:
+            return self.check_win(r, c, player)
+        return won
+
+    def remove(self, r, c, player):
+        counts = self.counts[player]
+        for line in self.lines.cell_lines[r * self.lines.grid_count + c]:
+            counts[line] -= 1
+
+    # True if the player's stone at (r, c) is part of a complete line
+    def check_win(self, r, c, player):
+        counts = self.counts[player]
+        length = self.lines.length
+        for line in self.lines.cell_lines[r * self.lines.grid_count + c]:
+            if counts[line] == length:
+                if not self.exact:
+                    return True
+                before, after = self.lines.neighbours[line]
+                if (before < 0 or counts[before] != length) and (after < 0 or counts[after] != length):
+                    return True
+        return False
@@ -0,0 +1,23 @@
+import random
+from symmetry import *
+
+_tables = {} # Zobrist keys shared between boards, keyed by grid_count
+
+class Zobrist:
+    """Random 64-bit key for every (player, cell); a position hashes to the XOR of the keys of its stones"""
+    def __init__(self, grid_count=19):
+        rng = random.Random(grid_count) # fixed seed so hashes are stable across processes and runs
+        self.keys = {'b': [rng.getrandbits(64) for i in range(grid_count * grid_count)],
+                     'w': [rng.getrandbits(64) for i in range(grid_count * grid_count)]}
+
+        # the keys of a cell's images under the 8 board symmetries packed into one integer, key of symmetry s in
+        # bits 64 * s and up: XORing these gives the hashes of all 8 images of a position at the cost of one
+        self.symmetric = {}
+        for player in ('b', 'w'):
+            self.symmetric[player] = [sum(self.keys[player][table[cell]] << (64 * s) for s, table in enumerate(get_symmetries(grid_count)))
+                                      for cell in range(grid_count * grid_count)]
+
+def get_zobrist(grid_count=19):
+    if grid_count not in _tables:
+        _tables[grid_count] = Zobrist(grid_count)
+    return _tables[grid_count]